@@ -3,72 +3,101 @@ Multi-Stage Docker Pipeline Demo Application
 A simple Flask application demonstrating optimized Docker builds
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, g, request
+import orjson
 import os
 import psutil
 import socket
+import time
 from datetime import datetime
 
 app = Flask(__name__)
 
+# Prime the CPU counter so later non-blocking reads return real deltas
+psutil.cpu_percent(interval=None)
+_last_cpu = {'ts': 0.0, 'val': 0.0}
+CPU_SAMPLE_INTERVAL = 0.5
+
 # Application metadata
 APP_VERSION = os.getenv('APP_VERSION', '1.0.0')
 BUILD_DATE = os.getenv('BUILD_DATE', 'unknown')
 GIT_COMMIT = os.getenv('GIT_COMMIT', 'unknown')
 
 
+def ojsonify(obj):
+    """Serialize a payload with orjson and wrap it in a JSON response"""
+    return app.response_class(orjson.dumps(obj), mimetype='application/json')
+
+
+@app.before_request
+def _stamp_request():
+    """Take one timestamp per request; orjson formats it on serialization"""
+    g.ts = datetime.utcnow()
+
+
 @app.route('/')
 def home():
     """Home endpoint with application info"""
-    return jsonify({
+    return ojsonify({
         'message': 'Multi-Stage Docker Pipeline API',
         'version': APP_VERSION,
         'status': 'healthy',
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': g.ts
     })
 
 
 @app.route('/health')
 def health():
     """Health check endpoint"""
-    return jsonify({
+    return ojsonify({
         'status': 'healthy',
         'checks': {
             'api': 'up',
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': g.ts
         }
     }), 200
 
 
+# System information is fixed for the lifetime of the container, so the
+# /info payload is serialized once at startup
+_INFO_BYTES = orjson.dumps({
+    'application': {
+        'version': APP_VERSION,
+        'build_date': BUILD_DATE,
+        'git_commit': GIT_COMMIT
+    },
+    'system': {
+        'hostname': socket.gethostname(),
+        'cpu_count': psutil.cpu_count(),
+        'memory_mb': round(psutil.virtual_memory().total / (1024 * 1024), 2),
+        'python_version': os.sys.version.split()[0]
+    },
+    'container': {
+        'running_in_container': os.path.exists('/.dockerenv'),
+        'user': os.getenv('USER', 'unknown')
+    }
+})
+
+
 @app.route('/info')
 def info():
     """System information endpoint"""
-    return jsonify({
-        'application': {
-            'version': APP_VERSION,
-            'build_date': BUILD_DATE,
-            'git_commit': GIT_COMMIT
-        },
-        'system': {
-            'hostname': socket.gethostname(),
-            'cpu_count': psutil.cpu_count(),
-            'memory_mb': round(psutil.virtual_memory().total / (1024 * 1024), 2),
-            'python_version': os.sys.version.split()[0]
-        },
-        'container': {
-            'running_in_container': os.path.exists('/.dockerenv'),
-            'user': os.getenv('USER', 'unknown')
-        }
-    })
+    return app.response_class(_INFO_BYTES, mimetype='application/json')
 
 
 @app.route('/metrics')
 def metrics():
     """Resource usage metrics"""
-    cpu_percent = psutil.cpu_percent(interval=1)
+    # Non-blocking CPU read, refreshed at most every CPU_SAMPLE_INTERVAL
+    # seconds so the handler never sleeps in psutil
+    now = time.monotonic()
+    if now - _last_cpu['ts'] > CPU_SAMPLE_INTERVAL:
+        _last_cpu['val'] = psutil.cpu_percent(interval=None)
+        _last_cpu['ts'] = now
+    cpu_percent = _last_cpu['val']
     memory = psutil.virtual_memory()
     
-    return jsonify({
+    return ojsonify({
         'cpu_percent': cpu_percent,
         'memory': {
             'total_mb': round(memory.total / (1024 * 1024), 2),
@@ -76,10 +105,47 @@ def metrics():
             'used_mb': round(memory.used / (1024 * 1024), 2),
             'percent': memory.percent
         },
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': g.ts
     })
 
 
+class StandaloneApplication:
+    """Run the app under gunicorn when launched directly"""
+
+    def __init__(self, port):
+        self.port = port
+
+    def run(self):
+        import gunicorn.app.base
+
+        try:
+            import meinheld  # noqa: F401
+            worker_class = 'meinheld.gmeinheld.MeinheldWorker'
+        except ImportError:
+            worker_class = 'gthread'
+
+        options = {
+            'bind': f'0.0.0.0:{self.port}',
+            'workers': os.cpu_count(),
+            'worker_class': worker_class,
+            'keepalive': 5,
+        }
+
+        class _GunicornApp(gunicorn.app.base.BaseApplication):
+            def load_config(inner):
+                for key, value in options.items():
+                    inner.cfg.set(key, value)
+
+            def load(inner):
+                return app
+
+        _GunicornApp().run()
+
+
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
+    if os.getenv('FLASK_DEBUG'):
+        # Werkzeug dev server for local debugging only
+        app.run(host='0.0.0.0', port=port)
+    else:
+        StandaloneApplication(port).run()
@@ -0,0 +1,115 @@
+"""
+Shared helpers for the monitoring trackers
+JSON Lines persistence, docker inspection and formatting used by both
+size-tracker.py and track-build-time.py
+"""
+
+import csv
+import io
+import json
+import subprocess
+import time
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+
+def human_size(size_bytes):
+    """Convert bytes to human-readable format"""
+    if size_bytes is None:
+        return "N/A"
+
+    # Pick the unit from the bit length instead of repeated division
+    i = min(4, max(0, (int(size_bytes).bit_length() - 1) // 10))
+    return f"{size_bytes / (1 << (i * 10)):.2f} {SIZE_UNITS[i]}"
+
+
+def utc_timestamp():
+    """Current UTC time as an ISO-8601 string, skipping datetime construction"""
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime())
+
+
+def load_entries(data_file, key):
+    """Load JSON Lines history, migrating legacy whole-file JSON once"""
+    loads = orjson.loads if orjson is not None else json.loads
+
+    if data_file.exists():
+        raw = data_file.read_bytes()
+        try:
+            entries = [loads(line) for line in raw.splitlines() if line.strip()]
+        except ValueError:
+            # Pretty-printed legacy file passed as --data-file: one JSON
+            # document spread over many lines
+            return _migrate_legacy(data_file, loads(raw), key)
+        if len(entries) == 1 and isinstance(entries[0], dict) and key in entries[0]:
+            # Compact legacy file: the whole history on a single line
+            return _migrate_legacy(data_file, entries[0], key)
+        return {key: entries}
+
+    # One-time migration from a legacy whole-file sibling of the
+    # default .jsonl name
+    legacy = data_file.with_suffix('.json')
+    if legacy.exists():
+        return _migrate_legacy(data_file, loads(legacy.read_bytes()), key)
+
+    return {key: []}
+
+
+def _migrate_legacy(data_file, history, key):
+    """Rewrite a legacy whole-file history as JSON Lines"""
+    if orjson is not None:
+        data = b''.join(orjson.dumps(entry) + b'\n' for entry in history[key])
+    else:
+        data = ''.join(json.dumps(entry) + '\n' for entry in history[key]).encode()
+    data_file.write_bytes(data)
+    return history
+
+
+def append_entry(data_file, entry):
+    """Append a single entry to the JSON Lines history file"""
+    if orjson is not None:
+        data = orjson.dumps(entry) + b'\n'
+    else:
+        data = (json.dumps(entry) + '\n').encode()
+    with open(data_file, 'ab') as f:
+        f.write(data)
+
+
+def dump_pretty(history):
+    """Render history as indented JSON for human inspection"""
+    if orjson is not None:
+        return orjson.dumps(history, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(history, indent=2)
+
+
+def inspect_sizes(*image_names):
+    """Get sizes of several Docker images with a single docker inspect"""
+    try:
+        result = subprocess.run(
+            ['docker', 'inspect', '--format={{.Size}}', *image_names],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        return [int(size) for size in result.stdout.split()]
+    except subprocess.CalledProcessError:
+        print(f"Error: Image not found among: {', '.join(image_names)}")
+        return None
+    except Exception as e:
+        print(f"Error getting image sizes: {e}")
+        return None
+
+
+def write_csv(filename, header, rows):
+    """Write a header and rows to a CSV file with one bulk write"""
+    buf = io.StringIO()
+    # LF terminators as before; newline='' stops text-mode translation
+    writer = csv.writer(buf, lineterminator='\n')
+    writer.writerow(header)
+    writer.writerows(rows)
+    Path(filename).write_text(buf.getvalue(), encoding='utf-8', newline='')
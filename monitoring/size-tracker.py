@@ -3,74 +3,78 @@ Docker Image Size Tracker
 Monitors and tracks Docker image sizes over time, comparing multi-stage vs single-stage builds
 """
 
-import json
 import os
-import subprocess
 import sys
-from datetime import datetime
 from pathlib import Path
 
+from _common import (
+    append_entry,
+    dump_pretty,
+    human_size,
+    inspect_sizes,
+    load_entries,
+    utc_timestamp,
+    write_csv,
+)
+
 
 class SizeTracker:
     """Track Docker image sizes and generate reports"""
-    
-    def __init__(self, data_file="size-history.json"):
+
+    def __init__(self, data_file="size-history.jsonl"):
         self.data_file = Path(data_file)
         self.history = self._load_history()
-    
+        self.stats = self._compute_stats()
+
     def _load_history(self):
-        """Load historical size data from JSON file"""
-        if self.data_file.exists():
-            with open(self.data_file, 'r') as f:
-                return json.load(f)
-        return {"entries": []}
-    
-    def _save_history(self):
-        """Save size history to JSON file"""
-        with open(self.data_file, 'w') as f:
-            json.dump(self.history, f, indent=2)
-    
+        """Load historical size data from the JSON Lines file"""
+        return load_entries(self.data_file, "entries")
+
+    def _append_entry(self, entry):
+        """Append a single entry to the JSON Lines history file"""
+        append_entry(self.data_file, entry)
+
+    def _compute_stats(self):
+        """Build running size totals from the loaded history"""
+        stats = {"count": 0, "multi_size_sum": 0, "single_size_sum": 0}
+        for entry in self.history["entries"]:
+            self._accumulate_entry(stats, entry)
+        return stats
+
+    @staticmethod
+    def _accumulate_entry(stats, entry):
+        """Fold one entry into the running totals"""
+        stats["count"] += 1
+        stats["multi_size_sum"] += entry["multi_stage"]["size_bytes"]
+        stats["single_size_sum"] += entry["single_stage"]["size_bytes"]
+
     def get_image_size(self, image_name):
         """Get size of Docker image in bytes"""
-        try:
-            result = subprocess.run(
-                ['docker', 'inspect', '--format={{.Size}}', image_name],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            return int(result.stdout.strip())
-        except subprocess.CalledProcessError:
-            print(f"Error: Image {image_name} not found")
-            return None
-        except Exception as e:
-            print(f"Error getting image size: {e}")
-            return None
-    
+        sizes = inspect_sizes(image_name)
+        return sizes[0] if sizes else None
+
     def get_human_readable_size(self, size_bytes):
         """Convert bytes to human-readable format"""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.2f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.2f} TB"
-    
+        return human_size(size_bytes)
+
     def track_images(self, multi_stage_image, single_stage_image, commit_sha=None):
         """Track sizes of both multi-stage and single-stage images"""
-        multi_size = self.get_image_size(multi_stage_image)
-        single_size = self.get_image_size(single_stage_image)
-        
-        if multi_size is None or single_size is None:
+        sizes = inspect_sizes(multi_stage_image, single_stage_image)
+
+        if sizes is None:
             print("Error: Could not retrieve image sizes")
             return False
-        
+
+        multi_size, single_size = sizes
+
         # Calculate savings
         size_reduction = single_size - multi_size
         reduction_percent = (size_reduction / single_size) * 100
-        
+
+
         # Create entry
         entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": utc_timestamp(),
             "commit": commit_sha or "unknown",
             "multi_stage": {
                 "image": multi_stage_image,
@@ -90,7 +94,8 @@ class SizeTracker:
         }
         
         self.history["entries"].append(entry)
-        self._save_history()
+        self._accumulate_entry(self.stats, entry)
+        self._append_entry(entry)
         
         return entry
     
@@ -114,62 +119,74 @@ class SizeTracker:
             print("No historical data available")
             return
         
-        print("\n" + "="*80)
-        print("Size Trend Report")
-        print("="*80)
-        print(f"Total Builds Tracked: {len(self.history['entries'])}")
-        print()
-        
-        # Calculate averages
-        total_multi = sum(e["multi_stage"]["size_bytes"] for e in self.history["entries"])
-        total_single = sum(e["single_stage"]["size_bytes"] for e in self.history["entries"])
-        count = len(self.history["entries"])
-        
-        avg_multi = total_multi / count
-        avg_single = total_single / count
+        # Accumulate the report and write it out in one go
+        lines = []
+        lines.append("\n" + "="*80)
+        lines.append("Size Trend Report")
+        lines.append("="*80)
+        lines.append(f"Total Builds Tracked: {len(self.history['entries'])}")
+        lines.append("")
+
+        # Averages from the running totals, no per-report scan
+        count = self.stats["count"]
+        avg_multi = self.stats["multi_size_sum"] / count
+        avg_single = self.stats["single_size_sum"] / count
         avg_reduction = ((avg_single - avg_multi) / avg_single) * 100
-        
-        print(f"Average Multi-Stage Size:  {self.get_human_readable_size(avg_multi)}")
-        print(f"Average Single-Stage Size: {self.get_human_readable_size(avg_single)}")
-        print(f"Average Reduction:         {avg_reduction:.2f}%")
-        print()
-        
+
+        lines.append(f"Average Multi-Stage Size:  {self.get_human_readable_size(avg_multi)}")
+        lines.append(f"Average Single-Stage Size: {self.get_human_readable_size(avg_single)}")
+        lines.append(f"Average Reduction:         {avg_reduction:.2f}%")
+        lines.append("")
+
         # Show last 5 entries
-        print("Recent History (Last 5 Builds):")
-        print("-" * 80)
-        print(f"{'Date':<20} {'Commit':<12} {'Multi-Stage':<15} {'Single-Stage':<15} {'Reduction':<10}")
-        print("-" * 80)
-        
+        lines.append("Recent History (Last 5 Builds):")
+        lines.append("-" * 80)
+        lines.append(f"{'Date':<20} {'Commit':<12} {'Multi-Stage':<15} {'Single-Stage':<15} {'Reduction':<10}")
+        lines.append("-" * 80)
+
         for entry in self.history["entries"][-5:]:
             date = entry["timestamp"][:19]
             commit = entry["commit"][:10]
             multi = entry["multi_stage"]["size_human"]
             single = entry["single_stage"]["size_human"]
             reduction = f"{entry['reduction']['percent']}%"
-            
-            print(f"{date:<20} {commit:<12} {multi:<15} {single:<15} {reduction:<10}")
-        
-        print("="*80 + "\n")
+
+            lines.append(f"{date:<20} {commit:<12} {multi:<15} {single:<15} {reduction:<10}")
+
+        lines.append("="*80 + "\n")
+        sys.stdout.write('\n'.join(lines) + '\n')
     
+    def print_pretty(self):
+        """Pretty-print the history for human inspection"""
+        sys.stdout.write(dump_pretty(self.history) + '\n')
+
     def export_csv(self, filename="size-history.csv"):
         """Export history to CSV format"""
         if not self.history["entries"]:
             print("No data to export")
             return
         
-        with open(filename, 'w') as f:
-            f.write("timestamp,commit,multi_stage_bytes,multi_stage_human,single_stage_bytes,single_stage_human,reduction_bytes,reduction_percent\n")
-            
-            for entry in self.history["entries"]:
-                f.write(f"{entry['timestamp']},")
-                f.write(f"{entry['commit']},")
-                f.write(f"{entry['multi_stage']['size_bytes']},")
-                f.write(f"{entry['multi_stage']['size_human']},")
-                f.write(f"{entry['single_stage']['size_bytes']},")
-                f.write(f"{entry['single_stage']['size_human']},")
-                f.write(f"{entry['reduction']['bytes']},")
-                f.write(f"{entry['reduction']['percent']}\n")
-        
+        header = [
+            "timestamp", "commit",
+            "multi_stage_bytes", "multi_stage_human",
+            "single_stage_bytes", "single_stage_human",
+            "reduction_bytes", "reduction_percent"
+        ]
+        rows = (
+            (
+                entry['timestamp'],
+                entry['commit'],
+                entry['multi_stage']['size_bytes'],
+                entry['multi_stage']['size_human'],
+                entry['single_stage']['size_bytes'],
+                entry['single_stage']['size_human'],
+                entry['reduction']['bytes'],
+                entry['reduction']['percent']
+            )
+            for entry in self.history["entries"]
+        )
+        write_csv(filename, header, rows)
+
         print(f"Data exported to {filename}")
 
 
@@ -202,10 +219,15 @@ def main():
         action='store_true',
         help='Export data to CSV'
     )
+    parser.add_argument(
+        '--pretty',
+        action='store_true',
+        help='Pretty-print history as indented JSON'
+    )
     parser.add_argument(
         '--data-file',
-        default='size-history.json',
-        help='Path to data file (default: size-history.json)'
+        default='size-history.jsonl',
+        help='Path to data file (default: size-history.jsonl)'
     )
     
     args = parser.parse_args()
@@ -222,7 +244,12 @@ def main():
     if args.export_csv:
         tracker.export_csv()
         return
-    
+
+    # Pretty-print history if requested
+    if args.pretty:
+        tracker.print_pretty()
+        return
+
     # Track current images
     print("Tracking Docker image sizes...")
     entry = tracker.track_images(
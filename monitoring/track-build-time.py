@@ -3,35 +3,88 @@ Docker Build Time Tracker
 Monitors and tracks Docker build times, cache hit rates, and build performance metrics
 """
 
-import json
+import functools
 import os
 import subprocess
 import sys
 import time
-from datetime import datetime
+from collections import deque
 from pathlib import Path
 
+from _common import (
+    append_entry,
+    dump_pretty,
+    human_size,
+    inspect_sizes,
+    load_entries,
+    utc_timestamp,
+    write_csv,
+)
+
 
 class BuildTimeTracker:
     """Track Docker build times and performance metrics"""
-    
-    def __init__(self, data_file="build-history.json"):
+
+    def __init__(self, data_file="build-history.jsonl"):
         self.data_file = Path(data_file)
         self.history = self._load_history()
-    
+        self.stats = self._compute_stats()
+
     def _load_history(self):
-        """Load historical build data from JSON file"""
-        if self.data_file.exists():
-            with open(self.data_file, 'r') as f:
-                return json.load(f)
-        return {"builds": []}
-    
-    def _save_history(self):
-        """Save build history to JSON file"""
-        with open(self.data_file, 'w') as f:
-            json.dump(self.history, f, indent=2)
+        """Load historical build data from the JSON Lines file"""
+        return load_entries(self.data_file, "builds")
+
+    def _append_entry(self, entry):
+        """Append a single entry to the JSON Lines history file"""
+        append_entry(self.data_file, entry)
+
+    def _compute_stats(self):
+        """Build running aggregates from the loaded history"""
+        stats = {
+            "multi_count": 0,
+            "multi_duration_sum": 0.0,
+            "multi_cache_rate_sum": 0.0,
+            "multi_cached_count": 0,
+            "multi_cached_duration_sum": 0.0,
+            "multi_no_cache_count": 0,
+            "multi_no_cache_duration_sum": 0.0,
+            "multi_size_count": 0,
+            "multi_size_sum": 0,
+            "single_count": 0,
+            "single_duration_sum": 0.0,
+            "single_size_count": 0,
+            "single_size_sum": 0,
+        }
+        for build in self.history["builds"]:
+            self._accumulate_build(stats, build)
+        return stats
+
+    @staticmethod
+    def _accumulate_build(stats, build):
+        """Fold one build into the running aggregates"""
+        if build['build_type'] == 'multi-stage':
+            stats["multi_count"] += 1
+            stats["multi_duration_sum"] += build['duration_seconds']
+            stats["multi_cache_rate_sum"] += build['cache_hit_rate']
+            if build['no_cache']:
+                stats["multi_no_cache_count"] += 1
+                stats["multi_no_cache_duration_sum"] += build['duration_seconds']
+            else:
+                stats["multi_cached_count"] += 1
+                stats["multi_cached_duration_sum"] += build['duration_seconds']
+            if build.get('image_size_bytes'):
+                stats["multi_size_count"] += 1
+                stats["multi_size_sum"] += build['image_size_bytes']
+        else:
+            stats["single_count"] += 1
+            stats["single_duration_sum"] += build['duration_seconds']
+            if build.get('image_size_bytes'):
+                stats["single_size_count"] += 1
+                stats["single_size_sum"] += build['image_size_bytes']
     
-    def format_duration(self, seconds):
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def format_duration(seconds):
         """Convert seconds to human-readable duration"""
         if seconds < 60:
             return f"{seconds:.2f}s"
@@ -69,73 +122,71 @@ class BuildTimeTracker:
         
         # Start timer
         start_time = time.time()
-        
-        # Execute build
-        try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            end_time = time.time()
-            duration = end_time - start_time
-            
-            # Parse build output for cache hits
-            output = result.stdout
-            cache_hits = output.count('CACHED')
-            total_steps = output.count('Step ')
-            cache_hit_rate = (cache_hits / total_steps * 100) if total_steps > 0 else 0
-            
-            print(f"✓ Build completed in {self.format_duration(duration)}")
-            print(f"  Cache hits: {cache_hits}/{total_steps} ({cache_hit_rate:.1f}%)")
-            
-            return {
-                'success': True,
-                'duration': duration,
-                'cache_hits': cache_hits,
-                'total_steps': total_steps,
-                'cache_hit_rate': cache_hit_rate,
-                'output': output
-            }
-            
-        except subprocess.CalledProcessError as e:
-            end_time = time.time()
-            duration = end_time - start_time
-            
+
+        # Execute build, streaming output line by line so the full log
+        # never sits in memory. BuildKit writes its progress to stderr,
+        # so merge it into stdout and drain a single pipe; reading the
+        # streams one after the other can deadlock once either pipe
+        # buffer fills.
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+
+        # Count cache hits and steps as lines arrive, keeping a short
+        # tail of output for failure reporting
+        cache_hits = 0
+        total_steps = 0
+        tail = deque(maxlen=50)
+        for line in proc.stdout:
+            if line.startswith('Step '):
+                total_steps += 1
+            if 'CACHED' in line:
+                cache_hits += 1
+            tail.append(line)
+
+        returncode = proc.wait()
+
+        end_time = time.time()
+        duration = end_time - start_time
+
+        if returncode != 0:
+            error_output = ''.join(tail)
             print(f"✗ Build failed after {self.format_duration(duration)}")
-            print(f"Error: {e.stderr}")
-            
+            print(f"Error: {error_output}")
+
             return {
                 'success': False,
                 'duration': duration,
-                'error': e.stderr
+                'error': error_output
             }
+
+        cache_hit_rate = (cache_hits / total_steps * 100) if total_steps > 0 else 0
+
+        print(f"✓ Build completed in {self.format_duration(duration)}")
+        print(f"  Cache hits: {cache_hits}/{total_steps} ({cache_hit_rate:.1f}%)")
+
+        return {
+            'success': True,
+            'duration': duration,
+            'cache_hits': cache_hits,
+            'total_steps': total_steps,
+            'cache_hit_rate': cache_hit_rate
+        }
     
     def get_image_size(self, image_name):
         """Get size of Docker image in bytes"""
-        try:
-            result = subprocess.run(
-                ['docker', 'inspect', '--format={{.Size}}', image_name],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            return int(result.stdout.strip())
-        except Exception:
-            return None
-    
-    def get_human_readable_size(self, size_bytes):
+        sizes = inspect_sizes(image_name)
+        return sizes[0] if sizes else None
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def get_human_readable_size(size_bytes):
         """Convert bytes to human-readable format"""
-        if size_bytes is None:
-            return "N/A"
-        
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.2f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.2f} TB"
+        return human_size(size_bytes)
     
     def track_build(self, dockerfile, context, image_name, build_type="multi-stage", 
                    commit_sha=None, no_cache=False, build_args=None):
@@ -153,7 +204,7 @@ class BuildTimeTracker:
         
         # Create build entry
         entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": utc_timestamp(),
             "commit": commit_sha or "unknown",
             "build_type": build_type,
             "image_name": image_name,
@@ -169,7 +220,8 @@ class BuildTimeTracker:
         }
         
         self.history["builds"].append(entry)
-        self._save_history()
+        self._accumulate_build(self.stats, entry)
+        self._append_entry(entry)
         
         return entry
     
@@ -196,139 +248,148 @@ class BuildTimeTracker:
             return
         
         builds = self.history["builds"]
-        
-        print("\n" + "="*80)
-        print("Build Performance Report")
-        print("="*80)
-        print(f"Total Builds Tracked: {len(builds)}")
-        print()
-        
-        # Separate by build type
-        multi_stage = [b for b in builds if b['build_type'] == 'multi-stage']
-        single_stage = [b for b in builds if b['build_type'] == 'single-stage']
-        
+        stats = self.stats
+
+        # Accumulate the report and write it out in one go
+        lines = []
+        lines.append("\n" + "="*80)
+        lines.append("Build Performance Report")
+        lines.append("="*80)
+        lines.append(f"Total Builds Tracked: {len(builds)}")
+        lines.append("")
+
         # Calculate statistics for multi-stage
-        if multi_stage:
-            print("Multi-Stage Builds:")
-            print("-" * 80)
-            avg_duration = sum(b['duration_seconds'] for b in multi_stage) / len(multi_stage)
-            avg_cache_rate = sum(b['cache_hit_rate'] for b in multi_stage) / len(multi_stage)
-            cached_builds = [b for b in multi_stage if not b['no_cache']]
-            no_cache_builds = [b for b in multi_stage if b['no_cache']]
-            
-            print(f"  Total builds:           {len(multi_stage)}")
-            print(f"  Average duration:       {self.format_duration(avg_duration)}")
-            print(f"  Average cache hit rate: {avg_cache_rate:.1f}%")
-            
-            if cached_builds:
-                avg_cached = sum(b['duration_seconds'] for b in cached_builds) / len(cached_builds)
-                print(f"  With cache:             {self.format_duration(avg_cached)}")
-            
-            if no_cache_builds:
-                avg_no_cache = sum(b['duration_seconds'] for b in no_cache_builds) / len(no_cache_builds)
-                print(f"  Without cache:          {self.format_duration(avg_no_cache)}")
-            
-            print()
-        
+        if stats["multi_count"]:
+            lines.append("Multi-Stage Builds:")
+            lines.append("-" * 80)
+            avg_duration = stats["multi_duration_sum"] / stats["multi_count"]
+            avg_cache_rate = stats["multi_cache_rate_sum"] / stats["multi_count"]
+
+            lines.append(f"  Total builds:           {stats['multi_count']}")
+            lines.append(f"  Average duration:       {self.format_duration(avg_duration)}")
+            lines.append(f"  Average cache hit rate: {avg_cache_rate:.1f}%")
+
+            if stats["multi_cached_count"]:
+                avg_cached = stats["multi_cached_duration_sum"] / stats["multi_cached_count"]
+                lines.append(f"  With cache:             {self.format_duration(avg_cached)}")
+
+            if stats["multi_no_cache_count"]:
+                avg_no_cache = stats["multi_no_cache_duration_sum"] / stats["multi_no_cache_count"]
+                lines.append(f"  Without cache:          {self.format_duration(avg_no_cache)}")
+
+            lines.append("")
+
         # Calculate statistics for single-stage
-        if single_stage:
-            print("Single-Stage Builds:")
-            print("-" * 80)
-            avg_duration = sum(b['duration_seconds'] for b in single_stage) / len(single_stage)
-            
-            print(f"  Total builds:           {len(single_stage)}")
-            print(f"  Average duration:       {self.format_duration(avg_duration)}")
-            print()
-        
+        if stats["single_count"]:
+            lines.append("Single-Stage Builds:")
+            lines.append("-" * 80)
+            avg_duration = stats["single_duration_sum"] / stats["single_count"]
+
+            lines.append(f"  Total builds:           {stats['single_count']}")
+            lines.append(f"  Average duration:       {self.format_duration(avg_duration)}")
+            lines.append("")
+
         # Compare if both exist
-        if multi_stage and single_stage:
-            multi_avg = sum(b['duration_seconds'] for b in multi_stage) / len(multi_stage)
-            single_avg = sum(b['duration_seconds'] for b in single_stage) / len(single_stage)
-            
+        if stats["multi_count"] and stats["single_count"]:
+            multi_avg = stats["multi_duration_sum"] / stats["multi_count"]
+            single_avg = stats["single_duration_sum"] / stats["single_count"]
+
             if single_avg > multi_avg:
                 improvement = ((single_avg - multi_avg) / single_avg) * 100
                 time_saved = single_avg - multi_avg
-                print("Build Time Comparison:")
-                print("-" * 80)
-                print(f"  Multi-stage is {improvement:.1f}% faster")
-                print(f"  Average time saved: {self.format_duration(time_saved)}")
-                print()
-        
+                lines.append("Build Time Comparison:")
+                lines.append("-" * 80)
+                lines.append(f"  Multi-stage is {improvement:.1f}% faster")
+                lines.append(f"  Average time saved: {self.format_duration(time_saved)}")
+                lines.append("")
+
         # Show last 5 builds
-        print("Recent Builds (Last 5):")
-        print("-" * 80)
-        print(f"{'Date':<20} {'Type':<15} {'Duration':<12} {'Cache':<10} {'Size':<12}")
-        print("-" * 80)
-        
+        lines.append("Recent Builds (Last 5):")
+        lines.append("-" * 80)
+        lines.append(f"{'Date':<20} {'Type':<15} {'Duration':<12} {'Cache':<10} {'Size':<12}")
+        lines.append("-" * 80)
+
         for build in builds[-5:]:
             date = build['timestamp'][:19]
             build_type = build['build_type']
             duration = build['duration_human']
             cache = f"{build['cache_hit_rate']:.1f}%"
             size = build['image_size_human']
-            
-            print(f"{date:<20} {build_type:<15} {duration:<12} {cache:<10} {size:<12}")
-        
-        print("="*80 + "\n")
+
+            lines.append(f"{date:<20} {build_type:<15} {duration:<12} {cache:<10} {size:<12}")
+
+        lines.append("="*80 + "\n")
+        sys.stdout.write('\n'.join(lines) + '\n')
     
     def compare_builds(self):
         """Compare multi-stage vs single-stage builds"""
-        builds = self.history["builds"]
-        
-        multi_stage = [b for b in builds if b['build_type'] == 'multi-stage']
-        single_stage = [b for b in builds if b['build_type'] == 'single-stage']
-        
-        if not multi_stage or not single_stage:
+        stats = self.stats
+
+        if not stats["multi_count"] or not stats["single_count"]:
             print("Need both multi-stage and single-stage builds for comparison")
             return
-        
-        print("\n" + "="*70)
-        print("Multi-Stage vs Single-Stage Comparison")
-        print("="*70)
-        
+
+        # Accumulate the report and write it out in one go
+        lines = []
+        lines.append("\n" + "="*70)
+        lines.append("Multi-Stage vs Single-Stage Comparison")
+        lines.append("="*70)
+
         # Duration comparison
-        multi_avg_duration = sum(b['duration_seconds'] for b in multi_stage) / len(multi_stage)
-        single_avg_duration = sum(b['duration_seconds'] for b in single_stage) / len(single_stage)
+        multi_avg_duration = stats["multi_duration_sum"] / stats["multi_count"]
+        single_avg_duration = stats["single_duration_sum"] / stats["single_count"]
         duration_improvement = ((single_avg_duration - multi_avg_duration) / single_avg_duration) * 100
-        
-        print("\nBuild Duration:")
-        print(f"  Multi-Stage:  {self.format_duration(multi_avg_duration)}")
-        print(f"  Single-Stage: {self.format_duration(single_avg_duration)}")
-        print(f"  Improvement:  {duration_improvement:.1f}% faster")
-        
+
+        lines.append("\nBuild Duration:")
+        lines.append(f"  Multi-Stage:  {self.format_duration(multi_avg_duration)}")
+        lines.append(f"  Single-Stage: {self.format_duration(single_avg_duration)}")
+        lines.append(f"  Improvement:  {duration_improvement:.1f}% faster")
+
         # Size comparison
-        multi_avg_size = sum(b['image_size_bytes'] for b in multi_stage if b['image_size_bytes']) / len([b for b in multi_stage if b['image_size_bytes']])
-        single_avg_size = sum(b['image_size_bytes'] for b in single_stage if b['image_size_bytes']) / len([b for b in single_stage if b['image_size_bytes']])
+        multi_avg_size = stats["multi_size_sum"] / stats["multi_size_count"]
+        single_avg_size = stats["single_size_sum"] / stats["single_size_count"]
         size_reduction = ((single_avg_size - multi_avg_size) / single_avg_size) * 100
-        
-        print("\nImage Size:")
-        print(f"  Multi-Stage:  {self.get_human_readable_size(multi_avg_size)}")
-        print(f"  Single-Stage: {self.get_human_readable_size(single_avg_size)}")
-        print(f"  Reduction:    {size_reduction:.1f}% smaller")
-        
-        print("="*70 + "\n")
+
+        lines.append("\nImage Size:")
+        lines.append(f"  Multi-Stage:  {self.get_human_readable_size(multi_avg_size)}")
+        lines.append(f"  Single-Stage: {self.get_human_readable_size(single_avg_size)}")
+        lines.append(f"  Reduction:    {size_reduction:.1f}% smaller")
+
+        lines.append("="*70 + "\n")
+        sys.stdout.write('\n'.join(lines) + '\n')
     
+    def print_pretty(self):
+        """Pretty-print the history for human inspection"""
+        sys.stdout.write(dump_pretty(self.history) + '\n')
+
     def export_csv(self, filename="build-history.csv"):
         """Export history to CSV format"""
         if not self.history["builds"]:
             print("No data to export")
             return
         
-        with open(filename, 'w') as f:
-            f.write("timestamp,commit,build_type,image_name,duration_seconds,cache_hits,total_steps,cache_hit_rate,image_size_bytes,no_cache\n")
-            
-            for build in self.history["builds"]:
-                f.write(f"{build['timestamp']},")
-                f.write(f"{build['commit']},")
-                f.write(f"{build['build_type']},")
-                f.write(f"{build['image_name']},")
-                f.write(f"{build['duration_seconds']},")
-                f.write(f"{build['cache_hits']},")
-                f.write(f"{build['total_steps']},")
-                f.write(f"{build['cache_hit_rate']},")
-                f.write(f"{build.get('image_size_bytes', 0)},")
-                f.write(f"{build['no_cache']}\n")
-        
+        header = [
+            "timestamp", "commit", "build_type", "image_name",
+            "duration_seconds", "cache_hits", "total_steps",
+            "cache_hit_rate", "image_size_bytes", "no_cache"
+        ]
+        rows = (
+            (
+                build['timestamp'],
+                build['commit'],
+                build['build_type'],
+                build['image_name'],
+                build['duration_seconds'],
+                build['cache_hits'],
+                build['total_steps'],
+                build['cache_hit_rate'],
+                build.get('image_size_bytes', 0),
+                build['no_cache']
+            )
+            for build in self.history["builds"]
+        )
+        write_csv(filename, header, rows)
+
         print(f"Data exported to {filename}")
 
 
@@ -382,9 +443,14 @@ def main():
         action='store_true',
         help='Export data to CSV'
     )
+    parser.add_argument(
+        '--pretty',
+        action='store_true',
+        help='Pretty-print history as indented JSON'
+    )
     parser.add_argument(
         '--data-file',
-        default='build-history.json',
+        default='build-history.jsonl',
         help='Path to data file'
     )
     
@@ -407,7 +473,12 @@ def main():
     if args.export_csv:
         tracker.export_csv()
         return
-    
+
+    # Pretty-print history if requested
+    if args.pretty:
+        tracker.print_pretty()
+        return
+
     # Track build
     print(f"Tracking {args.type} build...")
     entry = tracker.track_build(